@@ -40,6 +40,8 @@ import logging
 from logging import handlers
 import threading
 import queue
+import types
+from collections import deque
 import dill
 #import pdb
 
@@ -53,6 +55,81 @@ DEFAULT_CONFPATH = '/etc/qzssdcragent.conf'
 
 DEFAULT_CACHEPATH = '/var/cache/qzssdcragent_cache.bin'
 
+# キャッシュログ(キャッシュファイルへの書き出し以降に追加されたキャッシュ)のファイル名の接尾辞
+CACHE_LOG_SUFFIX = '.log'
+# キャッシュログにこの件数を追記したらキャッシュファイルに書き出してキャッシュログを空にする
+CACHE_LOG_COMPACT_COUNT = 1000
+# 終了時にキャッシュログへの書き込みを待つ最大時間(秒)
+CACHE_LOG_STOP_TIMEOUT = 30
+
+# サブプロセス再実行までの待ち時間(秒)
+RETRY_WAIT_MIN = 5
+RETRY_WAIT_MAX = 300
+# この時間(秒)以上動作した後に終了した場合は待ち時間を初期値に戻す
+RETRY_RESET_SECONDS = 60
+
+# SMTPサーバーへの接続をこの時間(秒)送信が無い場合に切断する
+MAIL_IDLE_TIMEOUT = 60
+# 終了時に未送信のメールの送信を待つ最大時間(秒)
+MAIL_STOP_TIMEOUT = 30
+# SMTPサーバーの応答を待つ最大時間(秒)
+MAIL_SMTP_TIMEOUT = 20
+# 最初のメールからこの時間(秒)の間に届いたメールは、件名毎にまとめて1通で送信する
+MAIL_BATCH_WAIT = 2
+# まとめて送信する場合の本文の区切り
+MAIL_BATCH_SEPARATOR = '\n' + '-' * 40 + '\n\n'
+
+# 値を連結する際の区切り文字(キーワードが値をまたいで一致しないように使う)
+VALUES_SEPARATOR = '\0'
+
+# レポートのクラス毎のフィルターの設定キー、フィルター対象の属性、フィルターに一致しなかった場合の理由
+# 設定セクション名はクラス名と同じ
+REPORT_FILTERS = {
+    qzss_dc_report.QzssDcReportJmaAshFall : ('LocalGovernments', 'local_governments', 'LocalGovernment not found'),
+    qzss_dc_report.QzssDcReportJmaEarthquakeEarlyWarning : ('Regions', 'eew_forecast_regions', 'Region not found'),
+    qzss_dc_report.QzssDcReportJmaFlood : ('Regions', 'flood_forecast_regions', 'Region not found'),
+    qzss_dc_report.QzssDcReportJmaHypocenter : (None, None, None),
+    qzss_dc_report.QzssDcReportJmaMarine : ('Regions', 'marine_forecast_regions', 'Region not found'),
+    qzss_dc_report.QzssDcReportJmaNankaiTroughEarthquake : (None, None, None),
+    qzss_dc_report.QzssDcReportJmaNorthwestPacificTsunami : ('Regions', 'coastal_regions_en', 'Region not found'),
+    qzss_dc_report.QzssDcReportJmaSeismicIntensity : ('Prefectures', 'prefectures', 'Prefecture not found'),
+    qzss_dc_report.QzssDcReportJmaTsunami : ('Regions', 'tsunami_forecast_regions', 'Region not found'),
+    qzss_dc_report.QzssDcReportJmaTyphoon : (None, None, None),
+    qzss_dc_report.QzssDcReportJmaVolcano : ('LocalGovernments', 'local_governments', 'LocalGovernment not found'),
+    qzss_dc_report.QzssDcReportJmaWeather : ('Regions', 'weather_forecast_regions', 'Region not found'),
+    qzss_dc_report.QzssDcxJAlert : (None, None, None),
+    qzss_dc_report.QzssDcxLAlert : (None, None, None),
+    qzss_dc_report.QzssDcxMTInfo : (None, None, None),
+    qzss_dc_report.QzssDcxOutsideJapan : (None, None, None),
+}
+
+# フィルター設定の確認に使う、クラス毎の有効な値の辞書とその表示名
+FILTER_VALID_VALUES = {
+    qzss_dc_report.QzssDcReportJmaAshFall : (qzss_dcr_jma_local_government, 'Local Governments'),
+    qzss_dc_report.QzssDcReportJmaEarthquakeEarlyWarning : (qzss_dcr_jma_eew_forecast_region, 'Regions'),
+    qzss_dc_report.QzssDcReportJmaFlood : (qzss_dcr_jma_flood_forecast_region, 'Regions'),
+    qzss_dc_report.QzssDcReportJmaMarine : (qzss_dcr_jma_marine_forecast_region, 'Regions'),
+    qzss_dc_report.QzssDcReportJmaNorthwestPacificTsunami : (qzss_dcr_jma_coastal_region_en, 'Regions'),
+    qzss_dc_report.QzssDcReportJmaSeismicIntensity : (qzss_dcr_jma_prefecture, 'Prefectures'),
+    qzss_dc_report.QzssDcReportJmaTsunami : (qzss_dcr_jma_tsunami_forecast_region, 'Regions'),
+    qzss_dc_report.QzssDcReportJmaVolcano : (qzss_dcr_jma_local_government, 'Local Governments'),
+    qzss_dc_report.QzssDcReportJmaWeather : (qzss_dcr_jma_weather_forecast_region, 'Regions'),
+}
+
+# DCXメッセージのクラス毎のメールの件名
+DCX_MAIL_SUBJECTS = {
+    qzss_dc_report.QzssDcxJAlert : 'J-Alert',
+    qzss_dc_report.QzssDcxLAlert : 'L-Alert',
+    qzss_dc_report.QzssDcxMTInfo : 'Municipality-Transmitted Information',
+    qzss_dc_report.QzssDcxOutsideJapan : 'Information from Organizations outside Japan',
+}
+
+# 一刻を争うため、まとめずにすぐにメールを送信するクラス
+MAIL_URGENT_CLASSES = {
+    qzss_dc_report.QzssDcReportJmaEarthquakeEarlyWarning,
+    qzss_dc_report.QzssDcxJAlert,
+}
+
 DEFAULT_CONFIG = {
     'QzssDcReportJmaAshFall' : {
         'Use':1,
@@ -151,19 +228,106 @@ DEFAULT_CONFIG = {
 }
 
 args:'argparse.Namespace' = None
-config:'configparser.ConfigParser' = None
-cache:'list' = None
+settings:'types.SimpleNamespace' = None
+config_stamp:'tuple' = None
+cache:'deque' = None
+cache_index:'set' = set()
+cache_log:'io.BufferedWriter' = None
+cache_log_count:int = 0
+cache_log_thread:'threading.Thread' = None
 log:'logging.Logger' = None
 report:'logging.Logger' = None
+report_listener:'handlers.QueueListener' = None
+mail_thread:'threading.Thread' = None
 
 message_watcher_queue = queue.Queue()
+# シグナルハンドラからも終了通知を送るため、再入可能なSimpleQueueを使う
+mail_queue = queue.SimpleQueue()
+cache_log_queue = queue.SimpleQueue()
+
+def load_output_settings(conf:configparser.ConfigParser, section:str) -> types.SimpleNamespace:
+
+    # 出力先毎の共通設定
+    return types.SimpleNamespace(
+        use=conf.getboolean(section,'Use'),
+        report_incomplete_info=conf.getboolean(section,'ReportIncompleteInfo'),
+        ignore_filter=conf.getboolean(section,'IgnoreFilter'),
+        report_training=conf.getboolean(section,'ReportTraining'),
+        )
+
+def load_settings(conf:configparser.ConfigParser) -> types.SimpleNamespace:
+
+    # 動作中に参照する設定値は設定の読み込み時に変換しておく
+    # (ConfigParserのget系メソッドは呼び出し毎に文字列の変換が走るため)
+    s = types.SimpleNamespace()
+    s.cmdline = conf.get('Input','CmdLine').split(' ')
+    s.input_type = conf.get('Input','Type')
+    s.no_message_timeout = conf.getint('Input','NoMessageTimeout')
+    # キャッシュの有効期限はモノトニック時刻(ナノ秒)で比較する
+    s.cache_valid_period_ns = conf.getint('Input','CacheValidPeriodHour') * 3600 * 10**9
+    s.ignore_filter_when_training = conf.getboolean('Input','IgnoreFilterWhenTraining')
+    # クラス毎に設定値を組み込んだフィルター関数を用意する
+    s.report_filters = {}
+    for cls, (key, attr, reason) in REPORT_FILTERS.items():
+        section = cls.__name__
+        if key is not None:
+            keywords = split_keywords(conf.get(section,key))
+        else:
+            keywords = ()
+        s.report_filters[cls] = make_report_filter(
+            section, conf.getboolean(section,'Use'), attr, keywords, reason)
+    s.report_file = load_output_settings(conf, 'ReportFile')
+    s.stdout = load_output_settings(conf, 'StdOut')
+    s.mail = load_output_settings(conf, 'Mail')
+    s.mail.supless_header_from_text = conf.getboolean('Mail','SuplessHeaderFromText')
+    s.mail.host = conf.get('Mail','Host')
+    s.mail.port = conf.getint('Mail','Port')
+    s.mail.id = conf.get('Mail','Id')
+    s.mail.password = conf.get('Mail','Password')
+    s.mail.address = conf.get('Mail','Address')
+    s.mail.tls = conf.getboolean('Mail','Tls')
+    s.mail.ssl = conf.getboolean('Mail','Ssl')
+    return s
+
+def make_report_filter(section:str, use:bool, attr:str, keywords:tuple, reason:str):
+
+    # レポートがフィルターで除外される場合にTrueを返す関数を作る
+    # 設定値による分岐はここで済ませ、受信毎には必要な処理だけを行う
+    if not use:
+        def report_filter(item) -> bool:
+            log.info('DCReport: %s Skipped. (Use=0)', section)
+            return True
+    elif attr is None or not keywords:
+        def report_filter(item) -> bool:
+            return False
+    else:
+        def report_filter(item) -> bool:
+            if check_partial_match(keywords, getattr(item, attr)):
+                return False
+            log.info('DCReport: %s Skipped. (%s)', section, reason)
+            return True
+    return report_filter
+
+def check_config(conf:configparser.ConfigParser) -> bool:
+
+    # フィルター設定確認
+    fail=False
+    for cls, (valid_values, label) in FILTER_VALID_VALUES.items():
+        section = cls.__name__
+        key = REPORT_FILTERS[cls][0]
+        joined = join_values(valid_values.values())
+        if not check_keywords(split_keywords(conf.get(section,key)), joined):
+            log.error(f'conf: {section}.{key} have no valid keyword.'
+                + f'\n Valid {label}: {valid_values.values()}')
+            fail=True
+    return not fail
 
 def message_watcher():
 
     # メッセージ監視スレッド
-    timeout_value = config.getint('Input','NoMessageTimeout')
+    timeout_value = settings.no_message_timeout
     timeout_occurred = False
-    log.info(f'message watcher started. (timeout={timeout_value}s)')
+    log.info('message watcher started. (timeout=%ss)', timeout_value)
 
     while True:
         try:
@@ -173,141 +337,219 @@ def message_watcher():
             timeout_occurred = False
         except queue.Empty as e:
             if not timeout_occurred:
-                log.warning(f'no message received in {timeout_value} seconds.')
+                log.warning('no message received in %s seconds.', timeout_value)
             timeout_occurred = True
 
-def remove_expired_cache(dtcurrent:datetime):
+def cache_key(report):
+
+    # キャッシュの検索キー
+    # azarashiのレポートはクラスとrawの一致で同一と判定されるため、それに合わせる
+    return (type(report), report.raw)
+
+def remove_expired_cache(nscurrent:int):
 
     # 期限切れキャッシュの削除
-    validperiod = config.getint('Input','CacheValidPeriodHour')
-    dtexpire = dtcurrent - timedelta(hours=validperiod)
-    while len(cache) > 0:
-        dtcached, obj = cache[0]
-        if dtcached >= dtexpire:
-            break
-        cache.pop(0)
-
-def check_partial_match(conf_items, values, confcheck=False) -> bool:
-
-    # 設定値が空欄の場合は常にTrueを報告
-    if len(conf_items) == 1 and conf_items[0] == '':
-        return True
+    # 時計の変更の影響を受けないように、受信時のモノトニック時刻で判定する
+    nsexpire = nscurrent - settings.cache_valid_period_ns
+    while cache and cache[0][0] < nsexpire:
+        nscached, dtcached, obj = cache.popleft()
+        cache_index.discard(cache_key(obj))
 
-    found = False
-    for item in conf_items:
-        item = item.strip()
-        for value in values:
-            if item in value:
-                found = True
-                break
-        if confcheck:
-            # 設定チェック時：見つかったら次の設定ワードを確認する
-            if found:
-                found = False
-                continue
-            else:
-                return False
-        else:
-            # 通常時：見つかったらチェックを終了する
-            if found:
-                break
-            else:
-                continue
-    if confcheck:
-        # 設定チェック時：全ての設定ワードが見つかったとしてTrueを報告
+def restore_cache_entry(dtcached:datetime, obj, dtbase:datetime, nsbase:int) -> tuple:
+
+    # 保存されたキャッシュの受信時刻を、現在のモノトニック時刻を基準にした値に換算する
+    # (モノトニック時刻は再起動を跨いで使えないため、保存は受信時刻のみで行う)
+    nscached = nsbase - (dtbase - dtcached) // timedelta(microseconds=1) * 1000
+    return (nscached, dtcached, obj)
+
+def split_keywords(value:str) -> tuple:
+
+    # カンマ区切りの設定値を前後の空白を除いたキーワードのタプルにする
+    # 設定値が空欄の場合は空のタプルとする
+    keywords = tuple(item.strip() for item in value.split(','))
+    if keywords == ('',):
+        return ()
+    return keywords
+
+def join_values(values) -> str:
+
+    # 値を区切り文字で連結した1つの文字列にする
+    return VALUES_SEPARATOR.join(values)
+
+def check_partial_match(keywords, values) -> bool:
+
+    # キーワードが無い(設定値が空欄の)場合は常にTrueを報告
+    if not keywords:
         return True
-    else:
-        # 通常時：全ての設定ワードに一致しない場合にFalseを報告
-        return found
 
-def send_mail(subject:str, text:str, clsname:str):
+    # いずれかのキーワードがいずれかの値に含まれる場合にTrueを報告
+    # 値を連結しておき、キーワード毎に1回の検索で済ませる
+    joined = join_values(values)
+    if len(keywords) == 1:
+        # キーワードが1つの場合(よくある設定)はジェネレーターを使わずに検索する
+        return keywords[0] in joined
+    return any(keyword in joined for keyword in keywords)
 
-    msg = MIMEText(text, 'plain', 'utf-8')
-    msg['Subject'] = subject
-    msg['To'] = config.get('Mail','Address')
-    msg['From'] = config.get('Mail','Address')
+def check_keywords(keywords, joined:str) -> bool:
+
+    # 設定チェック用：全てのキーワードが連結済みの値のいずれかに含まれる場合にTrueを報告
+    return all(keyword in joined for keyword in keywords)
+
+def open_mail_server() -> smtplib.SMTP:
+
+    # SMTPサーバーへの接続とログイン
+    # (応答が無くなった場合に送信スレッドが止まったままにならないようにタイムアウトを設定する)
+    mail = settings.mail
+    if mail.ssl:
+        context = ssl.create_default_context()
+        server = smtplib.SMTP_SSL(mail.host, mail.port, timeout=MAIL_SMTP_TIMEOUT, context=context)
+    else:
+        server = smtplib.SMTP(mail.host, mail.port, timeout=MAIL_SMTP_TIMEOUT)
+        if mail.tls:
+            server.starttls()
+    server.login(mail.id, mail.password)
+    return server
 
+def close_mail_server(server:smtplib.SMTP):
+
+    # SMTPサーバーからの切断(失敗しても無視する)
     try:
-        host = config.get('Mail','Host')
-        port = config.getint('Mail','Port')
-        if config.getboolean('Mail','Ssl'):
-            context = ssl.create_default_context()
-            server = smtplib.SMTP_SSL(host, port, context=context)
-        else:
-            server = smtplib.SMTP(host, port)
-            if config.getboolean('Mail','Tls'):
-                server.starttls()
-        server.login(config.get('Mail','Id'), config.get('Mail','Password'))
-        server.send_message(msg)
         server.quit()
-        log.info(f'Mail: {clsname} send success.')
-
     except Exception as e:
-        log.exception(e)
-        log.warning(f'Mail: {clsname} send failed.')
+        server.close()
 
-def process_mail(dt:datetime, item, filtered, training, incomplete):
+def send_mail(server:smtplib.SMTP, subject:str, text:str):
 
-    if not config.getboolean('Mail','Use'):
-        return
-    if incomplete and not config.getboolean('Mail','ReportIncompleteInfo'):
-        return
-    if training and not config.getboolean('Mail','ReportTraining'):
-        return
-    if filtered and not config.getboolean('Mail','IgnoreFilter'):
-        return
+    msg = MIMEText(text, 'plain', 'utf-8')
+    msg['Subject'] = subject
+    msg['To'] = settings.mail.address
+    msg['From'] = settings.mail.address
+    server.send_message(msg)
+
+def mail_sender():
+
+    # メール送信スレッド
+    # 受信処理を止めないように送信はこのスレッドで行い、
+    # SMTPサーバーへの接続は切断せずに次の送信でも使い回す
+    # (サーバー側のタイムアウトで切断される前に、一定時間送信が無ければこちらから切断する)
+    # Noneを受け取った場合は接続を切断して終了する
+    server = None
+    server_settings = None
+    while True:
+        try:
+            item = mail_queue.get(
+                timeout=None if server is None else MAIL_IDLE_TIMEOUT)
+        except queue.Empty as e:
+            close_mail_server(server)
+            server = None
+            continue
+        if item is None:
+            if server is not None:
+                close_mail_server(server)
+            return
+
+        # 続けて届いたメールを待ち、同じ件名のメールは本文をつなげて1通にする
+        # 待っている間に終了を通知された場合は、それまでに集めたメールを送信してから終了する
+        # 緊急のメールを受け取った場合は待たずに送信する
+        mails = {}
+        stopping = False
+        deadline = time.monotonic() + MAIL_BATCH_WAIT
+        while True:
+            if item is None:
+                stopping = True
+                break
+            subject, text, cls = item
+            if subject in mails:
+                mails[subject][0].append(text)
+            else:
+                mails[subject] = ([text], cls)
+            if cls in MAIL_URGENT_CLASSES:
+                break
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = mail_queue.get(timeout=timeout)
+            except queue.Empty as e:
+                break
 
-    text = str(item)
+        for subject, (texts, cls) in mails.items():
+            text = MAIL_BATCH_SEPARATOR.join(texts)
+            try:
+                if server is not None and server_settings is not settings.mail:
+                    # 設定が再読み込みされた場合は新しい設定で接続し直す
+                    close_mail_server(server)
+                    server = None
+                if server is not None:
+                    try:
+                        send_mail(server, subject, text)
+                        log.info('Mail: %s send success. (count=%s)', cls.__name__, len(texts))
+                        continue
+                    except (smtplib.SMTPServerDisconnected, ConnectionError) as e:
+                        # サーバー側で切断されていた場合は接続し直して送信する
+                        log.info('Mail: connection lost. (%s) reconnecting...', e)
+                        close_mail_server(server)
+                        server = None
+                server_settings = settings.mail
+                server = open_mail_server()
+                send_mail(server, subject, text)
+                log.info('Mail: %s send success. (count=%s)', cls.__name__, len(texts))
+
+            except Exception as e:
+                log.exception(e)
+                log.warning('Mail: %s send failed. (count=%s)', cls.__name__, len(texts))
+                if server is not None:
+                    close_mail_server(server)
+                    server = None
+
+        if stopping:
+            if server is not None:
+                close_mail_server(server)
+            return
+
+def check_output(output:types.SimpleNamespace, filtered, training, incomplete) -> bool:
+
+    # 出力先の設定に従って出力するかどうかを判定する
+    if not output.use:
+        return False
+    if incomplete and not output.report_incomplete_info:
+        return False
+    if training and not output.report_training:
+        return False
+    if filtered and not output.ignore_filter:
+        return False
+    return True
+
+def process_mail(dt:datetime, item, cls:type, text:str, training):
 
     if isinstance(item, qzss_dc_report.QzssDcXtendedMessageBase):
-        if isinstance(item, qzss_dc_report.QzssDcxJAlert):
-            subject = 'J-Alert'
-        elif isinstance(item, qzss_dc_report.QzssDcxLAlert):
-            subject = 'L-Alert'
-        elif isinstance(item, qzss_dc_report.QzssDcxMTInfo):
-            subject = 'Municipality-Transmitted Information'
-        elif isinstance(item, qzss_dc_report.QzssDcxOutsideJapan):
-            subject = 'Information from Organizations outside Japan'
-        else:
-            subject = f'不明なクラス({type(item)})'
+        subject = DCX_MAIL_SUBJECTS.get(cls)
+        if subject is None:
+            subject = f'不明なクラス({cls})'
         if training:
             subject = '[訓練/試験]' + subject
         subject = '災危情報: ' + subject
 
     elif isinstance(item, qzss_dc_report.QzssDcReportJmaBase):
         subject = item.get_header()
-        if config.getboolean('Mail','SuplessHeaderFromText'):
-            # 本文に含まれるヘッダーを取り除く
-            text = text.replace(subject,'',1)
+        if settings.mail.supless_header_from_text:
+            # 本文の先頭に含まれるヘッダーを取り除く
+            text = text.removeprefix(subject)
     else:
-        subject = f'災危情報: 不明なクラス({type(item)})'
+        subject = f'災危情報: 不明なクラス({cls})'
 
     text += f'\n\n情報受信時刻: {dt.strftime(DATETIME_FORMAT)}\n'
-    send_mail(subject, text, item.__class__.__name__)
+    mail_queue.put((subject, text, cls))
 
-def process_report_file(dtcurrent:datetime, item, filtered, training, incomplete):
+def process_report_file(dtcurrent:datetime, text:str):
 
-    if incomplete and not config.getboolean('ReportFile','ReportIncompleteInfo'):
-        return
-    if training and not config.getboolean('ReportFile','ReportTraining'):
-        return
-    if filtered and not config.getboolean('ReportFile','IgnoreFilter'):
-        return
-    report.info(f'\n----- {dtcurrent.strftime(DATETIME_FORMAT)} --------------------')
-    report.info(item)
+    report.info('\n----- %s --------------------', dtcurrent.strftime(DATETIME_FORMAT))
+    report.info(text)
 
-def process_stdout(dtcurrent:datetime, item, filtered, training, incomplete):
+def process_stdout(dtcurrent:datetime, text:str):
 
-    if not config.getboolean('StdOut','Use'):
-        return
-    if incomplete and not config.getboolean('StdOut','ReportIncompleteInfo'):
-        return
-    if training and not config.getboolean('StdOut','ReportTraining'):
-        return
-    if filtered and not config.getboolean('StdOut','IgnoreFilter'):
-        return
     print(f'\n----- {dtcurrent.strftime(DATETIME_FORMAT)} --------------------')
-    print(item)
+    print(text)
 
 def process_report(dtcurrent:datetime, item):
 
@@ -321,131 +563,26 @@ def process_report(dtcurrent:datetime, item):
             training = True
 
     # 各クラス毎の確認
-    filtered = False
     incomplete = False
-    if isinstance(item, qzss_dc_report.QzssDcxNullMsg):
-        # Nullメッセージは常に無視
-        # dcr_report_handlerで処理されるので、ここには来ない
-        return
-    elif isinstance(item, qzss_dc_report.QzssDcxUnknown):
-        # Unknownメッセージは警告を表示
-        log.warning(f'QzssDcxUnknown: {type(item)}\n{item}')
-        return
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaAshFall):
-        if not config.getboolean('QzssDcReportJmaAshFall','Use'):
-            log.info('DCReport: QzssDcReportJmaAshFall Skipped. (Use=0)')
-            filtered = True
+    cls = type(item)
+    report_filter = settings.report_filters.get(cls)
+    if report_filter is None:
+        if isinstance(item, qzss_dc_report.QzssDcxNullMsg):
+            # Nullメッセージは常に無視
+            # dcr_report_handlerで処理されるので、ここには来ない
+            return
+        elif isinstance(item, qzss_dc_report.QzssDcxUnknown):
+            # Unknownメッセージは警告を表示
+            log.warning('QzssDcxUnknown: %s\n%s', cls, item)
+            return
         else:
-            lg = config.get('QzssDcReportJmaAshFall','LocalGovernments').split(',')
-            if not check_partial_match(lg, item.local_governments):
-                log.info('DCReport: QzssDcReportJmaAshFall Skipped. (LocalGovernment not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaEarthquakeEarlyWarning):
-        if not config.getboolean('QzssDcReportJmaEarthquakeEarlyWarning','Use'):
-            log.info('DCReport: QzssDcReportJmaEarthquakeEarlyWarning Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaEarthquakeEarlyWarning','Regions').split(',')
-            if not check_partial_match(regions, item.eew_forecast_regions):
-                log.info('DCReport: QzssDcReportJmaEarthquakeEarlyWarning Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaFlood):
-        if not config.getboolean('QzssDcReportJmaFlood','Use'):
-            log.info('DCReport: QzssDcReportJmaFlood Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaFlood','Regions').split(',')
-            if not check_partial_match(regions, item.flood_forecast_regions):
-                log.info('DCReport: QzssDcReportJmaFlood Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaHypocenter):
-        if not config.getboolean('QzssDcReportJmaHypocenter','Use'):
-            log.info('DCReport: QzssDcReportJmaHypocenter Skipped. (Use=0)')
-            filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaMarine):
-        if not config.getboolean('QzssDcReportJmaMarine','Use'):
-            log.info('DCReport: QzssDcReportJmaMarine Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaMarine','Regions').split(',')
-            if not check_partial_match(regions, item.marine_forecast_regions):
-                log.info('DCReport: QzssDcReportJmaMarine Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaNankaiTroughEarthquake):
-        if not config.getboolean('QzssDcReportJmaNankaiTroughEarthquake','Use'):
-            log.info('DCReport: QzssDcReportJmaNankaiTroughEarthquake Skipped. (Use=0)')
-            filtered = True
+            log.warning('Unknown DCReport instance: %s\n%s', cls, item)
+            return
+    filtered = report_filter(item)
+    if cls is qzss_dc_report.QzssDcReportJmaNankaiTroughEarthquake:
         if not item.completed:
-            log.info('DCReport: QzssDcReportJmaNankaiTroughEarthquake Skipped. (Incomplete)')
+            log.info('DCReport: %s Skipped. (Incomplete)', cls.__name__)
             incomplete = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaNorthwestPacificTsunami):
-        if not config.getboolean('QzssDcReportJmaNorthwestPacificTsunami','Use'):
-            log.info('DCReport: QzssDcReportJmaNorthwestPacificTsunami Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaNorthwestPacificTsunami','Regions').split(',')
-            if not check_partial_match(regions, item.coastal_regions_en):
-                log.info('DCReport: QzssDcReportJmaNorthwestPacificTsunami Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaSeismicIntensity):
-        if not config.getboolean('QzssDcReportJmaSeismicIntensity','Use'):
-            log.info('DCReport: QzssDcReportJmaSeismicIntensity Skipped. (Use=0)')
-            filtered = True
-        else:
-            prefectures = config.get('QzssDcReportJmaSeismicIntensity','Prefectures').split(',')
-            if not check_partial_match(prefectures, item.prefectures):
-                log.info('DCReport: QzssDcReportJmaSeismicIntensity Skipped. (Prefecture not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaTsunami):
-        if not config.getboolean('QzssDcReportJmaTsunami','Use'):
-            log.info('DCReport: QzssDcReportJmaTsunami Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaTsunami','Regions').split(',')
-            if not check_partial_match(regions, item.tsunami_forecast_regions):
-                log.info('DCReport: QzssDcReportJmaTsunami Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaTyphoon):
-        if not config.getboolean('QzssDcReportJmaTyphoon','Use'):
-            log.info('DCReport: QzssDcReportJmaTyphoon Skipped. (Use=0)')
-            filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaVolcano):
-        if not config.getboolean('QzssDcReportJmaVolcano','Use'):
-            log.info('DCReport: QzssDcReportJmaVolcano Skipped. (Use=0)')
-            filtered = True
-        else:
-            lg = config.get('QzssDcReportJmaVolcano','LocalGovernments').split(',')
-            if not check_partial_match(lg, item.local_governments):
-                log.info('DCReport: QzssDcReportJmaVolcano Skipped. (LocalGovernment not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcReportJmaWeather):
-        if not config.getboolean('QzssDcReportJmaWeather','Use'):
-            log.info('DCReport: QzssDcReportJmaWeather Skipped. (Use=0)')
-            filtered = True
-        else:
-            regions = config.get('QzssDcReportJmaWeather','Regions').split(',')
-            if not check_partial_match(regions, item.weather_forecast_regions):
-                log.info('DCReport: QzssDcReportJmaWeather Skipped. (Region not found)')
-                filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcxJAlert):
-        if not config.getboolean('QzssDcxJAlert','Use'):
-            log.info('DCReport: QzssDcxJAlert Skipped. (Use=0)')
-            filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcxLAlert):
-        if not config.getboolean('QzssDcxLAlert','Use'):
-            log.info('DCReport: QzssDcxLAlert Skipped. (Use=0)')
-            filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcxMTInfo):
-        if not config.getboolean('QzssDcxMTInfo','Use'):
-            log.info('DCReport: QzssDcxMTInfo Skipped. (Use=0)')
-            filtered = True
-    elif isinstance(item, qzss_dc_report.QzssDcxOutsideJapan):
-        if not config.getboolean('QzssDcxOutsideJapan','Use'):
-            log.info('DCReport: QzssDcxOutsideJapan Skipped. (Use=0)')
-            filtered = True
-    else:
-        log.warning(f'Unknown DCReport instance: {type(item)}\n{item}')
-        return
 
     if item.timestamp is not None:
         dt = item.timestamp
@@ -453,15 +590,28 @@ def process_report(dtcurrent:datetime, item):
         dt = dtcurrent
 
     # 訓練時はフィルターを無視する
-    if training and config.getboolean('Input','IgnoreFilterWhenTraining'):
+    if training and settings.ignore_filter_when_training:
         filtered = False
 
+    # 出力先の確認
+    to_report_file = check_output(settings.report_file, filtered, training, incomplete)
+    to_mail = check_output(settings.mail, filtered, training, incomplete)
+    to_stdout = check_output(settings.stdout, filtered, training, incomplete)
+    if not (to_report_file or to_mail or to_stdout):
+        return
+
+    # レポートの文字列化は各出力先で共通にして1回で済ませる
+    text = str(item)
+
     # レポートファイルへの出力
-    process_report_file(dt, item, filtered, training, incomplete)
+    if to_report_file:
+        process_report_file(dt, text)
     # メール送信
-    process_mail(dt, item, filtered, training, incomplete)
+    if to_mail:
+        process_mail(dt, item, cls, text, training)
     # 標準出力
-    process_stdout(dt, item, filtered, training, incomplete)
+    if to_stdout:
+        process_stdout(dt, text)
 
 def dcr_report_handler(report, *callback_args, **callback_kwargs):
 
@@ -472,81 +622,266 @@ def dcr_report_handler(report, *callback_args, **callback_kwargs):
     if isinstance(report, qzss_dc_report.QzssDcxNullMsg):
         return
 
-    # 受信時刻
-    dtcurrent = datetime.now() 
+    # 受信時刻(キャッシュの有効期限の判定用)
+    nscurrent = time.monotonic_ns()
 
     # キャッシュの確認と追加、レポートの処理
-    found = False
-    for dtcached, obj in cache:
-        if obj == report:
-            found = True
-            break
-    if not found:
-        cache.append((dtcurrent, report))
+    # 日時はレポートの出力とキャッシュの保存にのみ使うため、新しいレポートの場合だけ取得する
+    key = cache_key(report)
+    if key not in cache_index:
+        dtcurrent = datetime.now()
+        cache.append((nscurrent, dtcurrent, report))
+        cache_index.add(key)
         process_report(dtcurrent, report)
+        # キャッシュログへの追記はキャッシュログ書き込みスレッドで行う
+        if cache_log_thread is not None:
+            cache_log_queue.put((dtcurrent, report))
 
     # 期限切れキャッシュの削除
-    remove_expired_cache(dtcurrent)
+    remove_expired_cache(nscurrent)
+
+def dump_cache():
+
+    # キャッシュファイルへの書き出し
+    # 途中で失敗しても前回のキャッシュファイルが残るように、一時ファイルに書いてから置き換える
+    tmpfile = args.cache_file + '.tmp'
+    try:
+        with open(tmpfile, 'wb') as f:
+            # DCXレポートはazarashi内のローカルクラスを含むため、pickleではなくdillを使う
+            # モノトニック時刻は再起動後に意味を持たないため、受信時刻とレポートのみを保存する
+            # (キャッシュログ書き込みスレッドからも呼ばれるため、受信処理で変更される前に複製してから使う)
+            entries = list(cache)
+            dill.dump([(dtcached, obj) for nscached, dtcached, obj in entries], f, protocol=dill.HIGHEST_PROTOCOL)
+            # 電源断でも置き換え後のファイルの中身が失われないように、置き換える前にディスクに書き出す
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmpfile, args.cache_file)
+        # 置き換え(ディレクトリの更新)もディスクに書き出す
+        dirfd = os.open(os.path.dirname(os.path.abspath(args.cache_file)), os.O_RDONLY)
+        try:
+            os.fsync(dirfd)
+        finally:
+            os.close(dirfd)
+    except Exception as e:
+        try:
+            os.remove(tmpfile)
+        except Exception as e:
+            pass
+        raise
+
+def load_cache_log(dtbase:datetime, nsbase:int):
+
+    # 前回異常終了した場合にキャッシュログに残っているキャッシュを追加する
+    count = 0
+    try:
+        with open(args.cache_file + CACHE_LOG_SUFFIX, 'rb') as f:
+            while True:
+                try:
+                    dtcached, obj = dill.load(f)
+                except EOFError as e:
+                    break
+                key = cache_key(obj)
+                if key not in cache_index:
+                    cache.append(restore_cache_entry(dtcached, obj, dtbase, nsbase))
+                    cache_index.add(key)
+                    count += 1
+    except FileNotFoundError as e:
+        return
+    except Exception as e:
+        # 書き込み途中で終了した場合は末尾が壊れているので、読めたところまでを使う
+        log.exception(e)
+        log.warning('cache log load failed.')
+    log.info('cache log load completed. (count=%s)', count)
+
+def open_cache_log():
+
+    global cache_log, cache_log_count
+
+    # 現在のキャッシュをキャッシュファイルに書き出してから、キャッシュログを空にして開く
+    # 書き出しに失敗した場合はキャッシュログの内容を残すために追記で開く
+    # (失敗した場合も件数は数え直し、次の書き出しはまた一定件数の追記後に行う)
+    if cache_log is not None:
+        cache_log.close()
+        cache_log = None
+    cache_log_count = 0
+    mode = 'wb'
+    try:
+        dump_cache()
+    except Exception as e:
+        log.exception(e)
+        log.warning('cache dump failed.')
+        mode = 'ab'
+    try:
+        cache_log = open(args.cache_file + CACHE_LOG_SUFFIX, mode)
+    except Exception as e:
+        log.exception(e)
+        log.warning('cache log open failed.')
+
+def append_cache_log(dtcurrent:datetime, report):
+
+    global cache_log_count
+
+    # 追加したキャッシュをキャッシュログに追記する
+    # (異常終了や電源断の場合でも次回起動時に読み込めるように、ディスクまで書き出す)
+    if cache_log is None:
+        return
+    try:
+        dill.dump((dtcurrent, report), cache_log, protocol=dill.HIGHEST_PROTOCOL)
+        cache_log.flush()
+        os.fsync(cache_log.fileno())
+        cache_log_count += 1
+    except Exception as e:
+        log.exception(e)
+        log.warning('cache log write failed.')
+
+def cache_log_writer():
+
+    # キャッシュログ書き込みスレッド
+    # ディスクへの書き出しで受信処理を待たせないように、キャッシュログへの追記はこのスレッドで行う
+    # Noneを受け取った場合は終了する
+    while True:
+        item = cache_log_queue.get()
+        if item is None:
+            return
+        append_cache_log(*item)
+
+        # キャッシュログが長くなった場合は、キャッシュファイルに書き出してキャッシュログを空にする
+        # (長期間動作した後の異常終了で、起動時に大量のキャッシュログを読み込まないように)
+        if cache_log is not None and cache_log_count >= CACHE_LOG_COMPACT_COUNT:
+            open_cache_log()
 
 def signal_handler(signum, frame):
 
-    log.warning(f'Signal handler called with signal {signum}.')
+    log.warning('Signal handler called with signal %s.', signum)
+
+    # キャッシュログへの未書き込み分を書き出す
+    # (キャッシュファイルへの書き出しが重ならないように、スレッドの終了を待ってからダンプする)
+    if cache_log_thread is not None:
+        cache_log_queue.put(None)
+        cache_log_thread.join(CACHE_LOG_STOP_TIMEOUT)
 
     # キャッシュのダンプ
     if args.nodump_cache:
         log.warning('cache dump skipped.')
+    elif cache_log_thread is not None and cache_log_thread.is_alive():
+        # キャッシュログは次回起動時に読み込めるように残しておく
+        log.warning('cache log writer did not finish. cache dump skipped.')
     else:
         log.info('dumping cache...')
         try:
-            with open(args.cache_file, 'wb') as f:
-                dill.dump(cache, f)
-            log.info(f'cache dump completed. (count={len(cache)})')
+            dump_cache()
+            log.info('cache dump completed. (count=%s)', len(cache))
+            # キャッシュファイルに全て書き出したのでキャッシュログは不要
+            if cache_log is not None:
+                cache_log.close()
+                os.remove(args.cache_file + CACHE_LOG_SUFFIX)
         except Exception as e:
+            # キャッシュログは次回起動時に読み込めるように残しておく
             log.exception(e)
             log.warning('cache dump failed.')
-            try:
-                os.remove(args.cache_file)
-            except Exception as e:
-                pass
+
+    # 未送信のメールを送り終えるまで待つ
+    if mail_thread is not None:
+        log.info('waiting for mail sender...')
+        mail_queue.put(None)
+        mail_thread.join(MAIL_STOP_TIMEOUT)
+        if mail_thread.is_alive():
+            log.warning('mail sender did not finish.')
+
+    # レポートファイルへの未書き込み分を書き出す
+    if report_listener is not None:
+        report_listener.stop()
 
     log.warning('Terminate...')
     sys.exit(0)
 
+def get_config_stamp(path:str):
+
+    # 設定ファイルの更新時刻とサイズ(存在しない場合はNone)
+    # 更新時刻の分解能が粗いファイルシステムでの書き換えも検出できるようにサイズも見る
+    try:
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size)
+    except OSError as e:
+        return None
+
+def reload_handler(signum, frame):
+
+    global settings, config_stamp
+
+    log.warning('Signal handler called with signal %s.', signum)
+
+    # 設定ファイルが更新されていなければ再読み込みしない
+    stamp = get_config_stamp(args.config_file)
+    if stamp == config_stamp:
+        log.info('config file not changed. reload skipped.')
+        return
+
+    # 設定ファイルの再読み込み
+    # 失敗した場合は現在の設定のまま動作を続ける
+    # Inputの設定(CmdLine, Type)は次にサブプロセスを起動した時から反映される
+    # ReportFileの出力先は起動時にだけ準備するため、ReportFileの設定の変更は再起動するまで反映されない
+    log.info('reloading config file %s...', args.config_file)
+    newconfig = configparser.ConfigParser()
+    newconfig.read_dict(DEFAULT_CONFIG)
+    try:
+        with open(args.config_file) as cf:
+            newconfig.read_file(cf)
+        if not check_config(newconfig):
+            log.warning('config reload failed. Keep current settings.')
+            return
+        newsettings = load_settings(newconfig)
+    except Exception as e:
+        log.exception(e)
+        log.warning('config reload failed. Keep current settings.')
+        return
+
+    # 起動時にレポートファイルを準備していない場合に出力しても捨てられるだけなので、
+    # ReportFile.Useは起動時の値のままにする
+    if newsettings.report_file.use != settings.report_file.use:
+        log.warning('conf: ReportFile.Use change needs restart. Keep current value.')
+        newsettings.report_file.use = settings.report_file.use
+
+    settings = newsettings
+    config_stamp = stamp
+    log.info('config reload completed.')
+
 def main():
 
     # メインループ
+    retry_wait = RETRY_WAIT_MIN
     while True:
 
         log.info('subprocess starting...')
+        started = time.monotonic()
 
         try:
             
             # gpspipe等のコマンドの実行
             with subprocess.Popen(
-                    args=config.get('Input','CmdLine').split(' ')
+                    args=settings.cmdline
                     ,stdout=subprocess.PIPE
                     ,stderr=subprocess.DEVNULL
-                    ,bufsize=0
+                    ,bufsize=io.DEFAULT_BUFFER_SIZE
                     ,text=False ) as watchproc:
 
                 log.info('subprocess started. Wait for receiving messages...')
 
                 # デコード処理
-                with io.BufferedReader(watchproc.stdout, buffer_size=1) as stream:
-                    while True:
-                        try:
-                            azarashi.decode_stream(
-                                stream=stream
-                                ,msg_type=config.get('Input','Type')
-                                ,callback=dcr_report_handler
-                                ,unique=False
-                                ,ignore_dcr=False
-                                ,ignore_dcx=False)
-                        except Exception as e:
-                            # 例外を起こした場合はdecode_streamのループから抜けてコマンド実行をやり直す
-                            log.exception(e)
-                            log.warning('decode_stream occurred exception! decode_stream terminated.')
-                            break
+                while True:
+                    try:
+                        azarashi.decode_stream(
+                            stream=watchproc.stdout
+                            ,msg_type=settings.input_type
+                            ,callback=dcr_report_handler
+                            ,unique=False
+                            ,ignore_dcr=False
+                            ,ignore_dcx=False)
+                    except Exception as e:
+                        # 例外を起こした場合はdecode_streamのループから抜けてコマンド実行をやり直す
+                        log.exception(e)
+                        log.warning('decode_stream occurred exception! decode_stream terminated.')
+                        break
             
             # コマンド実行を中止する
             watchproc.terminate()
@@ -556,9 +891,13 @@ def main():
             log.error('subprocess occurred exception! Terminate...')
             sys.exit(3)
 
-        # watch processが終了してしまった場合は5秒待ってから再度実行
-        log.warning('subprocess terminated. Retry after 5 seconds...')
-        time.sleep(5)
+        # watch processが終了してしまった場合は待ってから再度実行
+        # 短時間で終了を繰り返す場合は待ち時間を倍々に延ばす
+        if time.monotonic() - started >= RETRY_RESET_SECONDS:
+            retry_wait = RETRY_WAIT_MIN
+        log.warning('subprocess terminated. Retry after %s seconds...', retry_wait)
+        time.sleep(retry_wait)
+        retry_wait = min(retry_wait * 2, RETRY_WAIT_MAX)
 
 if __name__ == '__main__':
 
@@ -589,85 +928,24 @@ if __name__ == '__main__':
     log.setLevel(args.log_level)
 
     # 設定ファイルの読み込み
+    config_stamp = get_config_stamp(args.config_file)
     config = configparser.ConfigParser()
     config.read_dict(DEFAULT_CONFIG)
     try:
         with open(args.config_file) as cf:
             config.read_file(cf)
-        log.info(f'config file is {args.config_file}')
+        log.info('config file is %s', args.config_file)
     except Exception as e:
         log.exception(e)
-        log.warning(f'config file {args.config_file} read failure. Use default values.')
+        log.warning('config file %s read failure. Use default values.', args.config_file)
 
     # フィルター設定確認
-    fail=False
-    if not check_partial_match(
-            config.get('QzssDcReportJmaAshFall','LocalGovernments').split(','),
-            qzss_dcr_jma_local_government.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaAshFall.LocalGovernments have no valid keyword.'
-            + f'\n Valid Local Governments: {qzss_dcr_jma_local_government.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaEarthquakeEarlyWarning','Regions').split(','),
-            qzss_dcr_jma_eew_forecast_region.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaEarthquakeEarlyWarning.Regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_eew_forecast_region.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaFlood','Regions').split(','),
-            qzss_dcr_jma_flood_forecast_region.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaFlood.Regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_flood_forecast_region.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaMarine','Regions').split(','),
-            qzss_dcr_jma_marine_forecast_region.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaMarine.Regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_marine_forecast_region.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaNorthwestPacificTsunami','Regions').split(','),
-            qzss_dcr_jma_coastal_region_en.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaNorthwestPacificTsunami.regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_coastal_region_en.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaSeismicIntensity','Prefectures').split(','),
-            qzss_dcr_jma_prefecture.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaSeismicIntensity.Prefectures have no valid keyword.'
-            + f'\n Valid Prefectures: {qzss_dcr_jma_prefecture.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaTsunami','Regions').split(','),
-            qzss_dcr_jma_tsunami_forecast_region.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaTsunami.Regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_tsunami_forecast_region.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaVolcano','LocalGovernments').split(','),
-            qzss_dcr_jma_local_government.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaVolcano.LocalGovernments have no valid keyword.'
-            + f'\n Valid Local Governments: {qzss_dcr_jma_local_government.values()}')
-        fail=True
-    if not check_partial_match(
-            config.get('QzssDcReportJmaWeather','Regions').split(','),
-            qzss_dcr_jma_weather_forecast_region.values(),             
-            confcheck=True):
-        log.error('conf: QzssDcReportJmaWeather.Regions have no valid keyword.'
-            + f'\n Valid Regions: {qzss_dcr_jma_weather_forecast_region.values()}')
-        fail=True
-    if fail:
+    if not check_config(config):
         log.error('Terminate...')
         sys.exit(2)
 
+    settings = load_settings(config)
+
     if args.test_only:
         log.error('-t option set. not execute.')
         log.error('Terminate...')
@@ -677,7 +955,7 @@ if __name__ == '__main__':
     report = logging.getLogger('report')
     if config.getboolean('ReportFile','Use'):
         report_file = config.get('ReportFile','Path')
-        log.info(f'Report file is {report_file}')
+        log.info('Report file is %s', report_file)
         report_handler = handlers.TimedRotatingFileHandler(
             filename=report_file,
             when=config.get('ReportFile','When'),
@@ -687,29 +965,54 @@ if __name__ == '__main__':
             )
         report_formatter = logging.Formatter('%(message)s')
         report_handler.setFormatter(report_formatter)
+        # ファイルへの書き込みやローテーションで受信処理を待たせないように別スレッドで行う
+        # (シグナルハンドラでの停止がputの途中に割り込んでもデッドロックしないように、再入可能なSimpleQueueを使う)
+        report_queue = queue.SimpleQueue()
+        report_listener = handlers.QueueListener(report_queue, report_handler)
+        report_listener.start()
+        report.addHandler(handlers.QueueHandler(report_queue))
     else:
-        report_handler = logging.NullHandler()
-    report.addHandler(report_handler)
+        report.addHandler(logging.NullHandler())
     report.setLevel(logging.INFO)
 
+    # 以降はConfigParserを直接参照せず、変換済みのsettingsだけを参照する
+    # (設定の再読み込み時はsettingsを丸ごと差し替える)
+    del config
+
     # キャッシュのロード
-    log.info(f'cache file is {args.cache_file}')
+    cache = deque()
+    log.info('cache file is %s', args.cache_file)
     if args.noload_cache:
         log.warning('cache load skipped.')
     else:
         log.info('loading cache...')
+        dtbase = datetime.now()
+        nsbase = time.monotonic_ns()
         try:
             with open(args.cache_file, 'rb') as f:
-                cache = dill.load(f)
-            log.info(f'cache load completed. (count={len(cache)})')
-            remove_expired_cache(datetime.now())
+                cache = deque(restore_cache_entry(dtcached, obj, dtbase, nsbase)
+                    for dtcached, obj in dill.load(f))
+            log.info('cache load completed. (count=%s)', len(cache))
         except FileNotFoundError as e:
             log.warning('cache file not found.')
         except Exception as e:
             log.exception(e)
             log.warning('cache load failed.')
-        if cache is None:
-            cache = []
+        cache_index.update(cache_key(obj) for nscached, dtcached, obj in cache)
+        load_cache_log(dtbase, nsbase)
+        remove_expired_cache(nsbase)
+
+    # キャッシュログの準備
+    if args.nodump_cache:
+        log.warning('cache log skipped.')
+    else:
+        open_cache_log()
+
+        # キャッシュログ書き込みスレッドの開始
+        cache_log_thread = threading.Thread(
+            target=cache_log_writer,
+            daemon=True)
+        cache_log_thread.start()
 
     # メッセージ監視スレッドの開始
     thread = threading.Thread(
@@ -717,4 +1020,13 @@ if __name__ == '__main__':
         daemon=True)
     thread.start()
 
+    # メール送信スレッドの開始
+    mail_thread = threading.Thread(
+        target=mail_sender,
+        daemon=True)
+    mail_thread.start()
+
+    # 設定再読み込みのシグナルハンドラの登録
+    signal.signal(signal.SIGHUP, reload_handler)
+
     main()
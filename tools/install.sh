@@ -34,6 +34,7 @@ After=gpsd.service
 [Service]
 Type=exec
 ExecStart=${INSTALL_DIR}/${EXEC_NAME} -c ${CONF_DIR}/${CONF_NAME}
+ExecReload=/bin/kill -HUP \$MAINPID
 
 [Install]
 WantedBy=multi-user.target